@@ -23,6 +23,9 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
+# Set max file size to 50MB (applies under app.run and WSGI servers alike)
+app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
+
 # Initialize noise filter
 noise_filter = SmartNoiseFilter()
 
@@ -293,9 +296,6 @@ def internal_error(error):
     }), 500
 
 if __name__ == '__main__':
-    # Set max file size to 50MB
-    app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
-    
     # Run server
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('FLASK_ENV') == 'development'
@@ -0,0 +1,432 @@
+"""
+Concurrency Load Test for BreatheMate Audio API
+Starts audio_api under gunicorn, replays synthetic breathing clips at stepped
+concurrency and reports throughput, latency percentiles, error rate and
+per-worker CPU/RSS as JSON
+
+Install extra dependencies with: pip install -r requirements-loadtest.txt
+"""
+
+import argparse
+import base64
+import io
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import psutil
+import requests
+import soundfile as sf
+from pydub import AudioSegment
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+logger = logging.getLogger(__name__)
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENDPOINTS = ['/process-audio', '/process-audio-file', '/analyze-noise']
+QUALITY_LEVELS = ['standard', 'high', 'premium']
+CLIP_SAMPLE_RATE = 44100
+
+
+def synthesize_breathing(duration_seconds: float, seed: int) -> np.ndarray:
+    """Generate a synthetic breathing clip: shaped noise bursts over background hum"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration_seconds * CLIP_SAMPLE_RATE)) / CLIP_SAMPLE_RATE
+
+    # Inhale/exhale cycle of roughly 15 breaths per minute
+    breath_rate = rng.uniform(0.2, 0.3)
+    envelope = np.clip(np.sin(2 * np.pi * breath_rate * t), 0, None) ** 2
+    breath = rng.normal(0, 0.3, len(t)) * envelope
+
+    # Mains hum and broadband room noise
+    hum = 0.05 * np.sin(2 * np.pi * 60 * t)
+    room = rng.normal(0, 0.02, len(t))
+
+    audio = breath + hum + room
+    return (audio / (np.max(np.abs(audio)) + 1e-10) * 0.9).astype(np.float32)
+
+
+def encode_clip(audio: np.ndarray, audio_format: str) -> bytes:
+    """Encode a float clip to the given container format"""
+    if audio_format == 'wav':
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, CLIP_SAMPLE_RATE, format='WAV', subtype='PCM_16')
+        return buffer.getvalue()
+
+    # Compressed formats go through pydub (requires ffmpeg)
+    audio_int16 = (audio * 32767).astype(np.int16)
+    segment = AudioSegment(
+        audio_int16.tobytes(),
+        frame_rate=CLIP_SAMPLE_RATE,
+        sample_width=2,
+        channels=1
+    )
+    buffer = io.BytesIO()
+    segment.export(buffer, format=audio_format)
+    return buffer.getvalue()
+
+
+def build_clips(durations: List[float], formats: List[str], seed: int) -> List[Dict[str, Any]]:
+    """Build the synthetic clip corpus, skipping formats that cannot be encoded"""
+    clips = []
+    for i, duration in enumerate(durations):
+        audio = synthesize_breathing(duration, seed + i)
+        for audio_format in formats:
+            try:
+                data = encode_clip(audio, audio_format)
+            except Exception as e:
+                logger.warning(f"Skipping {audio_format} clips: {e}")
+                formats = [f for f in formats if f != audio_format]
+                continue
+            clips.append({
+                "duration_seconds": duration,
+                "format": audio_format,
+                "data": data,
+                "data_b64": base64.b64encode(data).decode('utf-8')
+            })
+    return clips
+
+
+def build_request_mix(clips: List[Dict[str, Any]], endpoints: List[str],
+                      qualities: List[str]) -> List[Dict[str, Any]]:
+    """Expand clips into the list of request specs replayed during the test"""
+    mix = []
+    for clip in clips:
+        for endpoint in endpoints:
+            # Quality tier is only honoured by /process-audio
+            tiers = qualities if endpoint == '/process-audio' else [None]
+            for quality in tiers:
+                mix.append({"endpoint": endpoint, "clip": clip, "quality": quality})
+    return mix
+
+
+def send_request(session: requests.Session, base_url: str, spec: Dict[str, Any],
+                 timeout: float) -> Dict[str, Any]:
+    """Send one request and return its timing and outcome"""
+    clip = spec['clip']
+    url = base_url + spec['endpoint']
+    start = time.perf_counter()
+    try:
+        if spec['endpoint'] == '/process-audio':
+            # Multipart uploads hit request.json on this route, so use base64 JSON
+            response = session.post(url, json={
+                "audio_data": clip['data_b64'],
+                "options": {"format": clip['format'], "quality": spec['quality']}
+            }, timeout=timeout)
+        else:
+            files = {'audio': (f"clip.{clip['format']}", clip['data'])}
+            response = session.post(url, files=files, timeout=timeout)
+        # Drain the body so latency covers the full response
+        _ = response.content
+        status = response.status_code
+    except requests.RequestException as e:
+        logger.debug(f"Request to {url} failed: {e}")
+        status = None
+
+    return {
+        "endpoint": spec['endpoint'],
+        "started": start,
+        "latency": time.perf_counter() - start,
+        "status": status,
+        "ok": status == 200
+    }
+
+
+def select_window(results: List[Dict[str, Any]], window_start: float,
+                  window_end: float) -> List[Dict[str, Any]]:
+    """Keep every request started inside the measured window, however long it ran"""
+    return [r for r in results if window_start <= r['started'] < window_end]
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Aggregate raw request results into throughput, latency and error metrics"""
+    if not results:
+        return {
+            "requests": 0,
+            "errors": 0,
+            "error_rate": 0.0,
+            "throughput_rps": 0.0,
+            "latency_ms": {key: None for key in ('mean', 'p50', 'p95', 'p99', 'max')}
+        }
+
+    latencies_ms = np.array([r['latency'] for r in results]) * 1000
+    errors = sum(1 for r in results if not r['ok'])
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": errors / len(results),
+        # Only successful responses count towards throughput
+        "throughput_rps": (len(results) - errors) / elapsed,
+        "latency_ms": {
+            "mean": float(np.mean(latencies_ms)),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(np.max(latencies_ms))
+        }
+    }
+
+
+class WorkerSampler:
+    """Periodically samples CPU and RSS of the server's worker processes"""
+
+    def __init__(self, master_pid: Optional[int], interval: float = 0.5):
+        self.master_pid = master_pid
+        self.interval = interval
+        self.samples: Dict[int, Dict[str, List[float]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _workers(self) -> List[psutil.Process]:
+        try:
+            return psutil.Process(self.master_pid).children(recursive=True)
+        except psutil.Error:
+            return []
+
+    @staticmethod
+    def _prime(proc: psutil.Process):
+        try:
+            proc.cpu_percent(None)  # First reading is always 0.0
+        except psutil.Error:
+            pass
+
+    def _run(self):
+        procs = {p.pid: p for p in self._workers()}
+        for proc in procs.values():
+            self._prime(proc)
+
+        while not self._stop.wait(self.interval):
+            for proc in self._workers():
+                # Workers respawned by gunicorn are primed and read next interval
+                if proc.pid not in procs:
+                    procs[proc.pid] = proc
+                    self._prime(proc)
+                    continue
+                # Reuse primed Process objects so cpu_percent measures the interval
+                proc = procs[proc.pid]
+                try:
+                    cpu = proc.cpu_percent(None)
+                    rss = proc.memory_info().rss
+                except psutil.Error:
+                    continue
+                entry = self.samples.setdefault(proc.pid, {"cpu": [], "rss": []})
+                entry['cpu'].append(cpu)
+                entry['rss'].append(rss)
+
+    def start(self):
+        if self.master_pid is None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> List[Dict[str, Any]]:
+        """Stop sampling and return per-worker CPU/RSS statistics"""
+        if self._thread is None:
+            return []
+        self._stop.set()
+        self._thread.join()
+
+        stats = []
+        for pid, entry in sorted(self.samples.items()):
+            if not entry['cpu']:
+                continue
+            stats.append({
+                "pid": pid,
+                "cpu_percent_mean": float(np.mean(entry['cpu'])),
+                "cpu_percent_max": float(np.max(entry['cpu'])),
+                "rss_mb_max": float(np.max(entry['rss'])) / (1024 * 1024)
+            })
+        return stats
+
+
+def run_step(base_url: str, mix: List[Dict[str, Any]], concurrency: int, duration: float,
+             warmup: float, timeout: float, master_pid: Optional[int],
+             seed: int) -> Dict[str, Any]:
+    """Drive the service at a fixed concurrency and measure one curve point"""
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    warmup_end = time.perf_counter() + warmup
+    deadline = warmup_end + duration
+    sampler = WorkerSampler(master_pid)
+
+    def client(client_id: int):
+        rng = random.Random(seed * 1000 + client_id)
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                result = send_request(session, base_url, rng.choice(mix), timeout)
+                with lock:
+                    results.append(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(client, i) for i in range(concurrency)]
+        time.sleep(max(0.0, warmup_end - time.perf_counter()))
+        sampler.start()
+        # Sample only while the window is open, not while in-flight requests drain
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+        worker_stats = sampler.stop()
+        # Requests started in the window run to completion or timeout (an error)
+        for future in futures:
+            future.result()
+
+    results = select_window(results, warmup_end, deadline)
+
+    step = {"concurrency": concurrency, **summarize(results, duration)}
+    step['by_endpoint'] = {
+        endpoint: summarize([r for r in results if r['endpoint'] == endpoint], duration)
+        for endpoint in sorted({r['endpoint'] for r in results})
+    }
+    step['workers'] = worker_stats
+    return step
+
+
+def find_saturation(steps: List[Dict[str, Any]], min_gain: float = 0.05) -> Optional[int]:
+    """Return the first concurrency where throughput stops improving by min_gain"""
+    for prev, curr in zip(steps, steps[1:]):
+        if curr['throughput_rps'] <= prev['throughput_rps'] * (1 + min_gain):
+            return prev['concurrency']
+    return None
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_health(base_url: str, server: Optional[subprocess.Popen], timeout: float = 60.0):
+    """Block until the service answers /health"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Service at {base_url} did not become healthy within {timeout}s")
+
+
+def start_server(port: int, workers: int, request_timeout: int) -> subprocess.Popen:
+    """Start audio_api under gunicorn with sync worker processes"""
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '--workers', str(workers),
+        '--bind', f'127.0.0.1:{port}',
+        '--timeout', str(request_timeout),
+        '--log-level', 'warning',
+        'audio_api:app'
+    ]
+    logger.info(f"Starting service: {' '.join(cmd)}")
+    return subprocess.Popen(cmd, cwd=SERVICE_DIR)
+
+
+def parse_list(value: str, cast=str) -> List[Any]:
+    return [cast(v.strip()) for v in value.split(',') if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the BreatheMate audio API")
+    parser.add_argument('--url', help="Test an already running service instead of starting one")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help="gunicorn worker processes")
+    parser.add_argument('--concurrency', default='1,2,4,8,16',
+                        help="Comma-separated concurrency steps")
+    parser.add_argument('--duration', type=float, default=30.0,
+                        help="Measured seconds per step")
+    parser.add_argument('--warmup', type=float, default=5.0,
+                        help="Unmeasured seconds before each step")
+    parser.add_argument('--clip-lengths', default='5,15,30',
+                        help="Comma-separated synthetic clip lengths in seconds")
+    parser.add_argument('--formats', default='wav,mp3,webm',
+                        help="Comma-separated clip formats")
+    parser.add_argument('--qualities', default=','.join(QUALITY_LEVELS),
+                        help="Quality tiers for /process-audio")
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help="Comma-separated endpoints to exercise")
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help="Per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    clips = build_clips(parse_list(args.clip_lengths, float), parse_list(args.formats), args.seed)
+    if not clips:
+        logger.error("No clips could be generated")
+        return 1
+    mix = build_request_mix(clips, parse_list(args.endpoints), parse_list(args.qualities))
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = start_server(port, args.workers, int(args.timeout))
+
+    try:
+        wait_for_health(base_url, server)
+        master_pid = server.pid if server is not None else None
+
+        steps = []
+        for concurrency in parse_list(args.concurrency, int):
+            logger.info(f"Running step: concurrency={concurrency}")
+            step = run_step(base_url, mix, concurrency, args.duration, args.warmup,
+                            args.timeout, master_pid, args.seed)
+            latency = step['latency_ms']
+            logger.info(
+                f"concurrency={concurrency} rps={step['throughput_rps']:.2f} "
+                f"p50={latency['p50'] or 0:.0f}ms p99={latency['p99'] or 0:.0f}ms "
+                f"errors={step['error_rate']:.1%}"
+            )
+            steps.append(step)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    report = {
+        "target": base_url,
+        "server": None if args.url else {"type": "gunicorn", "workers": args.workers},
+        "config": {
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "clips": [{"duration_seconds": c['duration_seconds'], "format": c['format'],
+                       "bytes": len(c['data'])} for c in clips],
+            "endpoints": parse_list(args.endpoints),
+            "qualities": parse_list(args.qualities),
+            "seed": args.seed
+        },
+        "steps": steps,
+        "saturation_concurrency": find_saturation(steps)
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Tests for the load test's window selection, summary and saturation logic
+"""
+
+from load_test import find_saturation, select_window, summarize
+
+
+def make_result(started: float, latency: float, ok: bool = True):
+    return {
+        "endpoint": "/analyze-noise",
+        "started": started,
+        "latency": latency,
+        "status": 200 if ok else None,
+        "ok": ok
+    }
+
+
+def test_select_window_keeps_requests_that_outlive_the_window():
+    results = [
+        make_result(started=1.0, latency=2.0),   # started during warmup
+        make_result(started=5.0, latency=1.0),   # inside the window
+        make_result(started=12.0, latency=120.0, ok=False),  # timed out past deadline
+        make_result(started=15.0, latency=1.0),  # started after deadline
+    ]
+
+    selected = select_window(results, window_start=5.0, window_end=15.0)
+
+    assert [r['started'] for r in selected] == [5.0, 12.0]
+
+
+def test_summarize_counts_timeouts_as_errors_and_in_tail_latency():
+    results = [make_result(started=float(i), latency=0.1) for i in range(99)]
+    results.append(make_result(started=99.0, latency=120.0, ok=False))
+
+    summary = summarize(results, elapsed=10.0)
+
+    assert summary['requests'] == 100
+    assert summary['errors'] == 1
+    assert summary['error_rate'] == 0.01
+    assert summary['throughput_rps'] == 9.9
+    assert summary['latency_ms']['max'] == 120000.0
+    assert summary['latency_ms']['p99'] > 1000.0
+
+
+def test_summarize_empty_has_same_shape():
+    empty = summarize([], elapsed=10.0)
+    full = summarize([make_result(started=0.0, latency=0.1)], elapsed=10.0)
+
+    assert empty.keys() == full.keys()
+    assert empty['latency_ms'].keys() == full['latency_ms'].keys()
+    assert empty['requests'] == 0
+    assert empty['throughput_rps'] == 0.0
+
+
+def test_find_saturation_detects_plateau():
+    steps = [
+        {"concurrency": 1, "throughput_rps": 2.0},
+        {"concurrency": 2, "throughput_rps": 3.8},
+        {"concurrency": 4, "throughput_rps": 3.9},
+        {"concurrency": 8, "throughput_rps": 3.7},
+    ]
+
+    assert find_saturation(steps) == 2
+
+
+def test_find_saturation_with_zero_throughput():
+    steps = [
+        {"concurrency": 1, "throughput_rps": 0.0},
+        {"concurrency": 2, "throughput_rps": 0.0},
+    ]
+
+    assert find_saturation(steps) == 1
+
+
+def test_find_saturation_still_scaling():
+    steps = [
+        {"concurrency": 1, "throughput_rps": 1.0},
+        {"concurrency": 2, "throughput_rps": 2.0},
+    ]
+
+    assert find_saturation(steps) is None